@@ -2,7 +2,7 @@ import math
 import os
 import re
 
-from io import TextIOWrapper
+from io import BufferedReader, TextIOWrapper
 
 
 class Rule:
@@ -22,14 +22,46 @@ class Afx:
         self.rules = []
 
 
+class _DecodingReader:
+    def __init__(self, file: BufferedReader, encoding: str):
+        self.file = file
+        self.encoding = encoding
+
+    def readline(self) -> str:
+        return self.file.readline().decode(self.encoding, errors='replace')
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+
 class Affix:
-    def __init__(self, file: str):
+    def __init__(self, file: str, generation_only: bool = False):
         if not os.path.exists(file):
             raise FileNotFoundError(os.path.abspath(file))
         if not os.path.isfile(file):
             raise FileNotFoundError(os.path.abspath(file))
 
-        self._parse_affix_file(file)
+        self.file = file
+        self.generation_only = generation_only
+        if generation_only:
+            self._index_affix_file(file)
+        else:
+            self._parse_affix_file(file)
+
+    def get_afx(self, flag: str) -> Afx or None:
+        if flag not in self.afx:
+            offset = self._afx_offsets.pop(flag, None)
+            if offset is None:
+                return None
+            self._load_afx(offset)
+            if not self._afx_offsets:
+                self.close()
+        return self.afx.get(flag, None)
+
+    def close(self):
+        if self._afx_file is not None:
+            self._afx_file.file.close()
+            self._afx_file = None
 
     def __init_fields__(self):
         self.encoding = None
@@ -73,6 +105,8 @@ class Affix:
         self.compoundsyllable = None
         self.syllablenum = None
         self.afx = {}
+        self._afx_offsets = {}
+        self._afx_file = None
         self.circumfix = None
         self.forbiddenword = None
         self.fullstrip = False
@@ -271,33 +305,9 @@ class Affix:
                     parts = line.split(maxsplit=1)
                     self.keepcase = parts[1].strip()
                 elif line.startswith('ICONV'):
-                    iconv_count = self._parse_int_flag(line, 'ICONV', affix_file)
-                    while iconv_count > 0:
-                        line = self._get_next_not_empty_line(affix_file)
-                        if line is None:
-                            raise self._generate_syntax_error('ICONV', affix_file.tell())
-                        line = line.strip()
-                        if not line.startswith('ICONV'):
-                            raise self._generate_syntax_error('ICONV', affix_file.tell())
-                        parts = line.split(maxsplit=2)
-                        self.iconv[parts[1]] = parts[2]
-                        iconv_count = iconv_count - 1
-                    if iconv_count != 0:
-                        raise self._generate_syntax_error('ICONV', affix_file.tell())
+                    self._parse_conversion(line, 'ICONV', affix_file, self.iconv)
                 elif line.startswith('OCONV'):
-                    oconv_count = self._parse_int_flag(line, 'OCONV', affix_file)
-                    while oconv_count > 0:
-                        line = self._get_next_not_empty_line(affix_file)
-                        if line is None:
-                            raise self._generate_syntax_error('OCONV', affix_file.tell())
-                        line = line.strip()
-                        if not line.startswith('OCONV'):
-                            raise self._generate_syntax_error('OCONV', affix_file.tell())
-                        parts = line.split(maxsplit=2)
-                        self.oconv[parts[1]] = parts[2]
-                        oconv_count = oconv_count - 1
-                    if oconv_count != 0:
-                        raise self._generate_syntax_error('OCONV', affix_file.tell())
+                    self._parse_conversion(line, 'OCONV', affix_file, self.oconv)
                 elif line.startswith('LEMMA_PRESENT'):
                     parts = line.split(maxsplit=1)
                     self.lemma_present = parts[1].strip()
@@ -318,6 +328,74 @@ class Affix:
 
                 line = self._get_next_not_empty_line(affix_file)
 
+    def _index_affix_file(self, file: str, encoding: str = 'ASCII'):
+        self.__init_fields__()
+        self.encoding = encoding
+
+        with open(file, 'rb') as raw_file:
+            affix_file = _DecodingReader(raw_file, self.encoding)
+            offset = raw_file.tell()
+            line = self._get_next_not_empty_line(raw_file)
+
+            while line is not None:
+                line = line.strip()
+
+                if line.startswith((b'PFX', b'SFX')):
+                    parts = line.split()
+                    if len(parts) != 4 or not parts[3].isdigit():
+                        raise self._generate_syntax_error(parts[0].decode(), raw_file.tell())
+                    self._afx_offsets[parts[1].decode(self.encoding, errors='replace')] = offset
+                    count = int(parts[3])
+                    while count > 0:
+                        if self._get_next_not_empty_line(raw_file) is None:
+                            raise self._generate_syntax_error(parts[0].decode(), raw_file.tell())
+                        count = count - 1
+                else:
+                    line = line.decode(self.encoding, errors='replace')
+                    if line.startswith('SET'):
+                        parts = line.split(maxsplit=1)
+                        if self.encoding != parts[1].strip():
+                            raw_file.close()
+                            self._index_affix_file(file, parts[1].strip())
+                            return
+                    elif line.startswith('FLAG'):
+                        parts = line.split(maxsplit=1)
+                        self.flag = parts[1]
+                    elif line.startswith('AF'):
+                        self._parse_flag(line, 'AF', affix_file, self.af)
+                    elif line.startswith('ICONV'):
+                        self._parse_conversion(line, 'ICONV', affix_file, self.iconv)
+                    elif line.startswith('OCONV'):
+                        self._parse_conversion(line, 'OCONV', affix_file, self.oconv)
+                    elif line.startswith('COMPOUNDRULE'):
+                        self._parse_flag(line, 'COMPOUNDRULE', affix_file, self.compoundrule)
+                    elif line.startswith('COMPOUNDMIN'):
+                        self.compoundmin = self._parse_int_flag(line, '', affix_file)
+                    elif line.startswith('COMPOUNDFLAG'):
+                        parts = line.split(maxsplit=1)
+                        self.compoundflag = parts[1].strip()
+                    elif line.startswith('COMPOUNDBEGIN'):
+                        parts = line.split(maxsplit=1)
+                        self.compoundbegin = parts[1].strip()
+                    elif line.startswith('COMPOUNDLAST'):
+                        parts = line.split(maxsplit=1)
+                        self.compoundlast = parts[1].strip()
+                    elif line.startswith('COMPOUNDMIDDLE'):
+                        parts = line.split(maxsplit=1)
+                        self.compoundmiddle = parts[1].strip()
+                    elif line.startswith('COMPOUNDWORDMAX'):
+                        self.compoundwordmax = self._parse_int_flag(line, '', affix_file)
+
+                offset = raw_file.tell()
+                line = self._get_next_not_empty_line(raw_file)
+
+    def _load_afx(self, offset: int):
+        if self._afx_file is None:
+            self._afx_file = _DecodingReader(open(self.file, 'rb'), self.encoding)
+        self._afx_file.file.seek(offset)
+        line = self._get_next_not_empty_line(self._afx_file).strip()
+        self._parse_affix_flag(line, line[:3], self._afx_file)
+
     def _parse_affix_flag(self, line: str, pattern: str, file: TextIOWrapper):
         pattern, flag, cross_product, count = self._parse_affix_header(line, pattern, file)
 
@@ -379,6 +457,21 @@ class Affix:
 
         return option_name, flag, stripping, affix, condition, morphological_fields
 
+    def _parse_conversion(self, line: str, pattern: str, file: TextIOWrapper, table: dict):
+        count = self._parse_int_flag(line, pattern, file)
+        while count > 0:
+            line = self._get_next_not_empty_line(file)
+            if line is None:
+                raise self._generate_syntax_error(pattern, file.tell())
+            line = line.strip()
+            if not line.startswith(pattern):
+                raise self._generate_syntax_error(pattern, file.tell())
+            parts = line.split(maxsplit=2)
+            table[parts[1]] = parts[2]
+            count = count - 1
+        if count != 0:
+            raise self._generate_syntax_error(pattern, file.tell())
+
     def _parse_int_flag(self, line: str, pattern, file: TextIOWrapper):
         parts = line.split(maxsplit=1)
         if not parts[1].isdigit():
@@ -401,7 +494,7 @@ class Affix:
             raise self._generate_syntax_error(pattern, file.tell())
 
     @staticmethod
-    def _get_next_not_empty_line(file_handler: TextIOWrapper) -> str or None:
+    def _get_next_not_empty_line(file_handler: TextIOWrapper or BufferedReader) -> str or bytes or None:
         line = file_handler.readline()
         while line and line.isspace():
             line = file_handler.readline()
@@ -0,0 +1,167 @@
+import math
+import re
+
+try:
+    from secrets import randbelow
+except ImportError:
+    from random import randrange as randbelow
+
+from hunspell.affix import Affix
+from hunspell.dictionary import convert, split_flags
+
+_RULE_TOKEN = re.compile(r'(\([^)]+\)|[^()*?])([*?]?)')
+_QUANTIFIERS = {'': (1, 1), '?': (0, 1), '*': (0, math.inf)}
+
+
+def _convolve(a: list, b: list) -> list:
+    out = [0] * len(a)
+    for i, x in enumerate(a):
+        if x:
+            for j in range(len(a) - i):
+                out[i + j] = out[i + j] + x * b[j]
+    return out
+
+
+class CompoundSlot:
+    def __init__(self, stems: list, low: int, high: int, max_parts: int, max_length: int):
+        self.low = low
+        self.high = high
+        self.stems = {}
+        for stem in stems:
+            if len(stem) <= max_length:
+                self.stems.setdefault(len(stem), []).append(stem)
+
+        # powers[k][l] is the number of sequences of k stems with l characters in total
+        single = [0] * (max_length + 1)
+        for length, length_stems in self.stems.items():
+            single[length] = len(length_stems)
+        self.powers = [[1] + [0] * max_length]
+        for _ in range(max_parts):
+            self.powers.append(_convolve(self.powers[-1], single))
+
+    def sample(self, k: int, length: int, index: int) -> list:
+        parts = []
+        for j in range(k - 1, -1, -1):
+            for stem_length, length_stems in self.stems.items():
+                if stem_length > length:
+                    continue
+                weight = len(length_stems) * self.powers[j][length - stem_length]
+                if index < weight:
+                    break
+                index = index - weight
+            index, stem = divmod(index, len(length_stems))
+            parts.append(length_stems[stem])
+            length = length - stem_length
+        return parts
+
+
+class CompoundRule:
+    def __init__(self, slots: list, max_parts: int, min_length: int, max_length: int):
+        self.slots = slots
+        self.max_parts = max_parts
+        self.min_length = min_length
+        self.max_length = max_length
+        self.counts = self._count_table()
+        self.size = sum(self._allowed(self.counts[0][n]) for n in range(2, max_parts + 1))
+
+    def _allowed(self, counts: list) -> int:
+        return sum(counts[self.min_length + 1:])
+
+    def _count_table(self) -> list:
+        # counts[i][n][l] is the number of ways to fill the slots i.. with exactly n stems and l characters
+        empty = [0] * (self.max_length + 1)
+        counts = [[empty] * (self.max_parts + 1) for _ in range(len(self.slots) + 1)]
+        counts[-1][0] = [1] + [0] * self.max_length
+        for i in range(len(self.slots) - 1, -1, -1):
+            slot = self.slots[i]
+            for n in range(self.max_parts + 1):
+                total = empty
+                for k in range(slot.low, min(slot.high, n) + 1):
+                    filled = _convolve(slot.powers[k], counts[i + 1][n - k])
+                    total = [x + y for x, y in zip(total, filled)]
+                counts[i][n] = total
+        return counts
+
+    def sample(self, index: int) -> str:
+        for n in range(2, self.max_parts + 1):
+            if index < self._allowed(self.counts[0][n]):
+                break
+            index = index - self._allowed(self.counts[0][n])
+        for length in range(self.min_length + 1, self.max_length + 1):
+            if index < self.counts[0][n][length]:
+                break
+            index = index - self.counts[0][n][length]
+
+        parts = []
+        for i, slot in enumerate(self.slots):
+            k, slot_length, index = self._choose_fill(slot, self.counts[i + 1], n, length, index)
+            index, sequence = divmod(index, slot.powers[k][slot_length])
+            parts.extend(slot.sample(k, slot_length, sequence))
+            n = n - k
+            length = length - slot_length
+        return ''.join(parts)
+
+    @staticmethod
+    def _choose_fill(slot: CompoundSlot, rest: list, n: int, length: int, index: int) -> tuple:
+        for k in range(slot.low, min(slot.high, n) + 1):
+            for slot_length in range(length + 1):
+                weight = slot.powers[k][slot_length] * rest[n - k][length - slot_length]
+                if index < weight:
+                    return k, slot_length, index
+                index = index - weight
+        raise IndexError(index)
+
+
+class CompoundSampler:
+    def __init__(self, affix: Affix, tables: iter, max_parts: int = 2, min_length: int = 0, max_length: int = -1):
+        max_parts = int(min(max_parts, affix.compoundwordmax))
+
+        slot_flags = {}
+        rules = []
+        for rule in affix.compoundrule:
+            tokens = []
+            for flag, quantifier in _RULE_TOKEN.findall(rule):
+                flag = flag[1:-1] if flag.startswith('(') else flag
+                slot_flags[flag] = {flag}
+                tokens.append((flag,) + _QUANTIFIERS[quantifier])
+            rules.append(tokens)
+        if affix.compoundflag is not None or affix.compoundbegin is not None:
+            slot_flags['BEGIN'] = {affix.compoundflag, affix.compoundbegin} - {None}
+            slot_flags['MIDDLE'] = {affix.compoundflag, affix.compoundmiddle} - {None}
+            slot_flags['LAST'] = {affix.compoundflag, affix.compoundlast} - {None}
+            rules.append([('BEGIN', 1, 1), ('MIDDLE', 0, math.inf), ('LAST', 1, 1)])
+
+        stems = {slot: {} for slot in slot_flags}
+        if slot_flags:
+            # the stems are taken from the parsed dictionary chunks, a stem without flags is never part of a compound
+            for table in tables:
+                for stem, flags in zip(table.stems, table.flags):
+                    if not flags:
+                        continue
+                    stem = convert(stem, affix.oconv)
+                    if len(stem) < affix.compoundmin:
+                        continue
+                    flags = split_flags(flags, affix.flag)
+                    for slot, slot_flag in slot_flags.items():
+                        if not slot_flag.isdisjoint(flags):
+                            stems[slot][stem] = None
+        stems = {slot: list(slot_stems) for slot, slot_stems in stems.items()}
+
+        # compounds have to fit min_length < len(word) < max_length like the plain words
+        longest = max((len(stem) for slot_stems in stems.values() for stem in slot_stems), default=0)
+        max_length = longest * max_parts if max_length == -1 else min(max_length - 1, longest * max_parts)
+        max_length = max(max_length, 0)
+        self.rules = [CompoundRule([CompoundSlot(stems[slot], low, high, max_parts, max_length)
+                                    for slot, low, high in tokens], max_parts, min_length, max_length)
+                      for tokens in rules]
+        self.rules = [rule for rule in self.rules if rule.size > 0]
+        self.size = sum(rule.size for rule in self.rules)
+
+    def sample(self) -> str:
+        if self.size == 0:
+            raise ValueError('The dictionary does not allow any compound words.')
+        index = randbelow(self.size)
+        for rule in self.rules:
+            if index < rule.size:
+                return rule.sample(index)
+            index = index - rule.size
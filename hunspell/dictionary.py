@@ -1,11 +1,39 @@
+import mmap
 import os
 import re
 import sys
 from collections import deque
+from contextlib import contextmanager
 from io import IOBase
+from queue import Queue
+from tempfile import mkstemp
+from threading import Event, Thread
 
 from hunspell.affix import Afx, Affix, Rule
 
+_PIPELINE_BATCH_SIZE = 1024
+_PIPELINE_QUEUE_SIZE = 64
+_WRITE_BUFFER_SIZE = 1 << 20
+_READ_CHUNK_SIZE = 1 << 22
+_END = object()
+
+
+@contextmanager
+def atomic_open(file: str, mode: str = 'w', buffering: int = -1):
+    # write to a temporary file next to the target, so a failure never leaves a partial file behind
+    fd, tmp = mkstemp(suffix='.tmp', prefix=os.path.basename(file) + '.', dir=os.path.dirname(os.path.abspath(file)))
+    try:
+        with os.fdopen(fd, mode, buffering=buffering) as out:
+            yield out
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, file)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
 
 class Word:
     def __init__(self, line, flag_type: str = 'ascii', input_conversion=None, output_conversion=None):
@@ -48,14 +76,52 @@ class Word:
 
         for data_field in data_fields:
             comp = data_field.split(':')
-            print(comp[0].strip())
             if self.data_fields.get(comp[0].strip(), None) is None:
                 self.data_fields[comp[0].strip()] = []
             self.data_fields[comp[0].strip()].append(comp[1].strip())
 
+    @staticmethod
+    def from_stem(stem: str, flags: str, flag_type: str = 'ascii', output_conversion=None):
+        # the stem is already parsed and converted, so the line parsing of the constructor is skipped
+        word = Word.__new__(Word)
+        word.word = stem
+        word.__word = None
+        word.flags = split_flags(flags, flag_type) if flags else []
+        word.data_fields = {}
+        word.flag_type = flag_type
+        word._output_conversion = output_conversion if output_conversion is not None else {}
+        return word
+
     def update_data_fields(self, data_fields: dict):
-        for k, v in data_fields:
-            self.data_fields[k] = v if self.data_fields[k] is None else self.data_fields[k] + v
+        for k, v in data_fields.items():
+            self.data_fields[k] = v if self.data_fields.get(k, None) is None else self.data_fields[k] + v
+
+
+def split_flags(flags: str, flag_type: str = 'ascii') -> list:
+    if flag_type.lower() == 'long':
+        return list(map(''.join, zip(*[iter(flags)] * 2)))
+    return list(flags)
+
+
+def convert(word: str, conversion: dict or None) -> str:
+    return Word._replace(word, conversion) if conversion else word
+
+
+class StemTable:
+    def __init__(self):
+        self.stems = []
+        self.flags = []
+
+    def __len__(self):
+        return len(self.stems)
+
+    def append(self, stem: str, flags: str):
+        self.stems.append(stem)
+        self.flags.append(flags)
+
+    def words(self, flag_type: str = 'ascii', output_conversion: dict or None = None) -> iter:
+        for stem, flags in zip(self.stems, self.flags):
+            yield Word.from_stem(stem, flags, flag_type, output_conversion)
 
 
 def _generate_affix_word(word: Word, afx: Afx, input_conversion=None, output_conversion=None) -> deque:
@@ -107,7 +173,7 @@ def _generate_affix_word(word: Word, afx: Afx, input_conversion=None, output_con
 def _generate_affix_words(word: Word, affix: Affix) -> deque:
     words = deque()
     for flag in word.flags:
-        afx = affix.afx.get(flag, None)
+        afx = affix.get_afx(flag)
         if afx is None:
             continue
         if isinstance(afx, Afx):
@@ -116,7 +182,7 @@ def _generate_affix_words(word: Word, affix: Affix) -> deque:
                 words.append(new_word)
                 if afx.cross_product:
                     for flag2 in word.flags[word.flags.index(flag):]:
-                        afx2 = affix.afx.get(flag2, None)
+                        afx2 = affix.get_afx(flag2)
                         if afx2 is None:
                             continue
                         if isinstance(afx2, Afx):
@@ -128,10 +194,120 @@ def _generate_affix_words(word: Word, affix: Affix) -> deque:
     return words
 
 
+def _expand_word(word: Word, affix: Affix) -> list:
+    out = []
+    queue = deque((word,))
+    while len(queue) > 0:
+        word = queue.popleft()
+        out.append(word.get_word())
+        queue.extend(_generate_affix_words(word, affix))
+    return out
+
+
+def _drain(queue: Queue):
+    while queue.get() is not _END:
+        pass
+
+
+def _read_stage(dic: str, affix: Affix, stems: Queue, stop: Event, errors: list):
+    try:
+        for table in iter_stem_chunks(dic, affix.encoding, affix.iconv):
+            for start in range(0, len(table), _PIPELINE_BATCH_SIZE):
+                if stop.is_set():
+                    return
+                end = start + _PIPELINE_BATCH_SIZE
+                stems.put((table.stems[start:end], table.flags[start:end]))
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        stems.put(_END)
+
+
+def _expand_stage(affix: Affix, base_words_only: bool, stems: Queue, words: Queue, stop: Event, errors: list):
+    batch = None
+    try:
+        batch = stems.get()
+        while batch is not _END and not stop.is_set():
+            batch_stems, batch_flags = batch
+            if base_words_only:
+                words.put([convert(stem, affix.oconv) for stem in batch_stems])
+            else:
+                # only stems with flags are turned into words, the others are written as they are
+                out = []
+                for stem, flags in zip(batch_stems, batch_flags):
+                    if flags:
+                        out.extend(_expand_word(Word.from_stem(stem, flags, affix.flag, affix.oconv), affix))
+                    else:
+                        out.append(convert(stem, affix.oconv))
+                words.put(out)
+            batch = stems.get()
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        if batch is not _END:
+            _drain(stems)
+        words.put(_END)
+
+
+def write_word_list(aff: str, dic: str, wrd: str, base_words_only: bool = False, print_out: bool = True) -> set:
+    file = sys.stdout if print_out else IOBase()
+    print('Start parse affix file ...', file=file)
+    affix = Affix(aff, generation_only=True)
+    print('Finished parsing affix file', file=file)
+    print('Start generating word list ...', file=file)
+
+    errors = []
+    stop = Event()
+    stems = Queue(_PIPELINE_QUEUE_SIZE)
+    words = Queue(_PIPELINE_QUEUE_SIZE)
+    stages = [
+        Thread(target=_read_stage, args=(dic, affix, stems, stop, errors), daemon=True),
+        Thread(target=_expand_stage, args=(affix, base_words_only, stems, words, stop, errors), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    word_set = set()
+    batch = None
+    with atomic_open(wrd, 'w', _WRITE_BUFFER_SIZE) as wrd_file:
+        try:
+            batch = words.get()
+            while batch is not _END:
+                new_words = []
+                for w in batch:
+                    if w not in word_set:
+                        word_set.add(w)
+                        new_words.append(w)
+                if new_words:
+                    if len(word_set) > len(new_words):
+                        wrd_file.write(os.linesep)
+                    wrd_file.write(os.linesep.join(new_words))
+                print('\rgenerated words: {:<10d}'.format(len(word_set)), end='', file=file)
+                batch = words.get()
+        except BaseException:
+            stop.set()
+            if batch is not _END:
+                _drain(words)
+            raise
+        finally:
+            for stage in stages:
+                stage.join()
+            affix.close()
+        if errors:
+            raise errors[0]
+
+    print('\rgenerated words: {:<10d}'.format(len(word_set)), file=file)
+    print('Finished generating word list', file=file)
+    print(file=file)
+    return word_set
+
+
 def word_list(aff: str, dic: str, base_words_only: bool = False, print_out: bool = True) -> set:
     file = sys.stdout if print_out else IOBase()
     print('Start parse affix file ...', file=file)
-    affix = Affix(aff)
+    affix = Affix(aff, generation_only=True)
     print('Finished parsing affix file', file=file)
     print('Start parse dictionary file ...', file=file)
     dictionary = parse_dictionary(dic, affix.encoding, affix.flag, affix.iconv, affix.oconv)
@@ -154,6 +330,7 @@ def word_list(aff: str, dic: str, base_words_only: bool = False, print_out: bool
                 raise ValueError('Invalid Word: {} is type of {}.'.format(word, type(word)))
         print('\rnot processed words: {:<10d}'.format(len(queue)), file=file)
         print('Finished generating word list', file=file)
+    affix.close()
 
     word_set = set(out)
     print('generate Words: {:d}'.format(len(word_set)), file=file)
@@ -166,23 +343,53 @@ def parse_dictionary(file: str,
                      flag_type: str = 'ASCII',
                      input_conversion: dict or None = None,
                      output_conversion: dict or None = None) -> iter:
-    if output_conversion is None:
-        output_conversion = {}
-    if input_conversion is None:
-        input_conversion = {}
     if not os.path.exists(file):
         raise FileNotFoundError()
     if not os.path.isfile(file):
         raise FileNotFoundError()
-    words = deque()
 
-    with open(file, encoding=encoding) as dic:
-        for line in dic:
-            if line.isspace() or line.startswith(('#', ' ', '\t')) or line.strip().isdigit():
-                continue
+    return deque(iter_dictionary(file, encoding, flag_type, input_conversion, output_conversion))
 
-            word = Word(line, flag_type, input_conversion, output_conversion)
 
-            words.append(word)
+def iter_dictionary(file: str,
+                    encoding: str = 'ASCII',
+                    flag_type: str = 'ASCII',
+                    input_conversion: dict or None = None,
+                    output_conversion: dict or None = None) -> iter:
+    for table in iter_stem_chunks(file, encoding, input_conversion):
+        yield from table.words(flag_type, output_conversion)
 
-    return words
+
+def iter_stem_chunks(file: str, encoding: str = 'ASCII', input_conversion: dict or None = None) -> iter:
+    with open(file, 'rb') as dic:
+        size = os.fstat(dic.fileno()).st_size
+        if size == 0:
+            return
+
+        with mmap.mmap(dic.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < size:
+                end = data.find(b'\n', min(start + _READ_CHUNK_SIZE, size))
+                end = size if end == -1 else end + 1
+                lines = data[start:end].decode(encoding).split('\n')
+                start = end
+
+                table = StemTable()
+                append_stem = table.stems.append
+                append_flags = table.flags.append
+                for line in lines:
+                    if not line or line.isspace() or line.startswith(('#', ' ', '\t')) or line.strip().isdigit():
+                        continue
+
+                    stem, _, flags = line.partition('/')
+                    stem = stem.split(None, 1)
+                    if not stem:
+                        continue
+                    stem = stem[0]
+                    if input_conversion:
+                        stem = Word._replace(stem, input_conversion)
+                    flags = flags.split(None, 1)
+
+                    append_stem(stem)
+                    append_flags(flags[0] if flags else '')
+                yield table
@@ -0,0 +1,45 @@
+import itertools
+import math
+import unittest
+from collections import Counter
+
+from hunspell.compound import CompoundRule, CompoundSlot
+
+# (stems, low, high) per slot
+RULES = [
+    [(['a', 'bc'], 1, 1), (['de', 'f', 'ghi'], 1, 1)],
+    [(['a', 'bc'], 1, 1), (['x', 'yz'], 0, math.inf), (['de', 'f'], 1, 1)],
+    [(['ab', 'c'], 0, 1), (['d', 'ef', 'ghi'], 1, math.inf)],
+]
+
+
+def _brute_force(rule: list, max_parts: int, min_length: int, max_length: int) -> Counter:
+    compounds = Counter()
+    for n in range(2, max_parts + 1):
+        ranges = [range(low, int(min(high, n)) + 1) for _, low, high in rule]
+        for ks in itertools.product(*ranges):
+            if sum(ks) != n:
+                continue
+            choices = [stems for (stems, _, _), k in zip(rule, ks) for _ in range(k)]
+            for parts in itertools.product(*choices):
+                word = ''.join(parts)
+                if min_length < len(word) <= max_length:
+                    compounds[word] += 1
+    return compounds
+
+
+class CompoundRuleTest(unittest.TestCase):
+    def test_size_and_sample_match_enumeration(self):
+        for tokens in RULES:
+            for max_parts, min_length, max_length in ((2, 0, 12), (4, 0, 20), (4, 3, 20), (4, 0, 4), (3, 2, 5)):
+                with self.subTest(tokens=tokens, max_parts=max_parts, min_length=min_length, max_length=max_length):
+                    slots = [CompoundSlot(stems, low, high, max_parts, max_length) for stems, low, high in tokens]
+                    rule = CompoundRule(slots, max_parts, min_length, max_length)
+                    expected = _brute_force(tokens, max_parts, min_length, max_length)
+                    self.assertEqual(sum(expected.values()), rule.size)
+                    # every index maps to a different fill, so the samples are exactly the enumerated compounds
+                    self.assertEqual(expected, Counter(rule.sample(i) for i in range(rule.size)))
+
+
+if __name__ == '__main__':
+    unittest.main()
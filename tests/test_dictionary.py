@@ -0,0 +1,63 @@
+import io
+import os
+import stat
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from hunspell.dictionary import write_word_list
+
+AFF = '''SET UTF-8
+
+PFX P Y 1
+PFX P 0 ün .
+
+SFX S Y 1
+SFX S 0 s .
+'''
+
+
+class WriteWordListTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.aff = self._write('test.aff', AFF)
+        self.dic = self._write('test.dic', '2\ncat/S\ncat/P\n')
+        self.wrd = os.path.join(self.directory.name, 'test.wrd')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, name: str, content: str) -> str:
+        file = os.path.join(self.directory.name, name)
+        with open(file, 'w', encoding='UTF-8') as out:
+            out.write(content)
+        return file
+
+    def _write_word_list(self, dic: str) -> set:
+        with redirect_stdout(io.StringIO()):
+            return write_word_list(self.aff, dic, self.wrd)
+
+    def test_duplicate_stems_are_written_once(self):
+        word_set = self._write_word_list(self.dic)
+        with open(self.wrd) as wrd_file:
+            words = wrd_file.read().splitlines()
+        self.assertEqual(sorted(words), sorted(set(words)))
+        self.assertEqual({'cat', 'cats', 'üncat'}, set(words))
+        self.assertEqual(set(words), word_set)
+
+    def test_word_list_respects_umask(self):
+        umask = os.umask(0o027)
+        try:
+            self._write_word_list(self.dic)
+        finally:
+            os.umask(umask)
+        self.assertEqual(0o640, stat.S_IMODE(os.stat(self.wrd).st_mode))
+
+    def test_failure_leaves_no_word_list(self):
+        with self.assertRaises(OSError):
+            self._write_word_list(os.path.join(self.directory.name, 'missing.dic'))
+        self.assertEqual(['test.aff', 'test.dic'], sorted(os.listdir(self.directory.name)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import pickle
+import random
+import re
+import tempfile
+import unittest
+
+from wordindex import WordIndex, open_word_index
+
+PATTERNS = [
+    '^ab', 'ab$', 'a.c', '[a-c]d', '(?:ab)+e', 'ä', '^a|b$', '(?i:AB)c', '(?i)ab', '\\n', 'e\\Z', '^$', 'a{2,}',
+    '[^a]b', '(a)(b)?c$', 'x', '^ß.*ä$', 'd\\n', '[\\x00-\\x7f]', '[\\t-z]', '[\\n-\\r]', '[\\r]', '\\s',
+]
+
+
+class WordIndexTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(1)
+        self.words = [''.join(rnd.choice('abcdeäöüß') for _ in range(rnd.randint(1, 8))) + '\n'
+                      for _ in range(3000)]
+        self.words += ['äöü\n', 'über\n', 'zz']
+        self.index = WordIndex(self.words)
+
+    def test_filter_matches_full_scan(self):
+        for pattern in PATTERNS:
+            reg = re.compile(pattern)
+            for negate in (False, True):
+                with self.subTest(pattern=pattern, negate=negate):
+                    expected = [w for w in self.words if (reg.search(w) is None) == negate]
+                    self.assertEqual(expected, self.index.filter(reg, negate))
+
+    def test_candidates_narrow_literal_patterns(self):
+        candidates = self.index.candidates(re.compile('^ab'))
+        self.assertIsNotNone(candidates)
+        self.assertLess(len(candidates), len(self.words))
+
+
+class OpenWordIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.wrd = os.path.join(self.directory.name, 'test.wrd')
+        self.idx = os.path.join(self.directory.name, 'test.idx')
+        with open(self.wrd, 'w') as wrd_file:
+            wrd_file.write('abc\nabd\nbcd\nüber\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _assert_index(self, word_index: WordIndex):
+        reg = re.compile('^ab')
+        self.assertEqual(['abc\n', 'abd\n'], word_index.filter(reg))
+        self.assertEqual(['über\n'], word_index.filter(re.compile('über')))
+
+    def test_saved_index_is_loaded(self):
+        open_word_index(self.idx, self.wrd)
+        self.assertTrue(os.path.isfile(self.idx))
+        self._assert_index(open_word_index(self.idx, self.wrd))
+
+    def test_truncated_index_is_rebuilt(self):
+        open_word_index(self.idx, self.wrd)
+        with open(self.idx, 'r+b') as index_file:
+            index_file.truncate(os.path.getsize(self.idx) - 4)
+        self._assert_index(open_word_index(self.idx, self.wrd))
+        self._assert_index(open_word_index(self.idx, self.wrd))
+
+    def test_foreign_index_is_not_unpickled(self):
+        with open(self.idx, 'wb') as index_file:
+            pickle.dump(WordIndex([]), index_file)
+        self._assert_index(open_word_index(self.idx, self.wrd))
+
+
+if __name__ == '__main__':
+    unittest.main()
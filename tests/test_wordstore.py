@@ -0,0 +1,74 @@
+import math
+import os
+import tempfile
+import unittest
+
+from wordstore import UniformSampler, WeightedSampler, open_union_store
+
+
+class UnionWordStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sources = [self._write('en.wrd', 'cat\ndog\nhaus\n'), self._write('de.wrd', 'haus\nkatze\nhund\n')]
+        self.uni = os.path.join(self.directory.name, 'en+de.uni')
+        self.wrd = os.path.join(self.directory.name, 'en+de.wrd')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, name: str, content: str) -> str:
+        file = os.path.join(self.directory.name, name)
+        with open(file, 'w') as out:
+            out.write(content)
+        return file
+
+    def _read_words(self) -> list:
+        with open(self.wrd) as wrd_file:
+            return list(wrd_file)
+
+    def test_shared_words_are_merged(self):
+        store = open_union_store(self.uni, self.wrd, self.sources)
+        words = self._read_words()
+        self.assertEqual(['cat\n', 'dog\n', 'haus\n', 'katze\n', 'hund\n'], words)
+        self.assertEqual(0b11, store.mask('haus\n'))
+        self.assertEqual(0b01, store.mask('cat\n'))
+        self.assertEqual(0b10, store.mask('hund\n'))
+
+    def test_saved_store_is_loaded(self):
+        open_union_store(self.uni, self.wrd, self.sources)
+        stat = os.stat(self.uni)
+        store = open_union_store(self.uni, self.wrd, self.sources)
+        self.assertEqual(stat.st_mtime_ns, os.stat(self.uni).st_mtime_ns)
+        self.assertEqual(0b11, store.mask('haus'))
+
+    def test_truncated_store_is_rebuilt(self):
+        open_union_store(self.uni, self.wrd, self.sources)
+        with open(self.uni, 'r+b') as store_file:
+            store_file.truncate(os.path.getsize(self.uni) - 3)
+        store = open_union_store(self.uni, self.wrd, self.sources)
+        self.assertEqual(0b10, store.mask('hund'))
+        self.assertEqual(0b10, open_union_store(self.uni, self.wrd, self.sources).mask('hund'))
+
+    def test_zero_weight_excludes_a_language(self):
+        store = open_union_store(self.uni, self.wrd, self.sources)
+        sampler = WeightedSampler(self._read_words(), store, [0, 1])
+        self.assertEqual(3, sampler.size)
+        self.assertAlmostEqual(math.log2(3), sampler.entropy)
+        for _ in range(200):
+            self.assertIn(sampler.choice(), ['haus\n', 'katze\n', 'hund\n'])
+
+    def test_uniform_entropy(self):
+        open_union_store(self.uni, self.wrd, self.sources)
+        sampler = UniformSampler(self._read_words())
+        self.assertEqual(5, sampler.size)
+        self.assertAlmostEqual(math.log2(5), sampler.entropy)
+
+    def test_equal_weights_on_disjoint_languages_are_uniform(self):
+        sources = [self._write('a.wrd', 'a\nb\n'), self._write('b.wrd', 'c\nd\n')]
+        store = open_union_store(self.uni, self.wrd, sources)
+        sampler = WeightedSampler(self._read_words(), store, [1, 1])
+        self.assertAlmostEqual(math.log2(4), sampler.entropy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+import json
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left
+
+from hunspell.dictionary import atomic_open
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+_BEGIN_ANCHORS = (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING)
+_END_ANCHORS = (sre_parse.AT_END, sre_parse.AT_END_STRING)
+_INDEX_VERSION = 1
+
+
+class _Constraints:
+    def __init__(self):
+        self.prefix = ''
+        self.suffix = ''
+        self.literals = []
+        self.classes = []
+
+
+class WordIndex:
+    def __init__(self, words: list, source_stat: tuple = None):
+        self.words = words
+        self.source_stat = source_stat
+        self.chars = {}
+        self.bigrams = {}
+
+        for i, word in enumerate(words):
+            key = self._key(word)
+            for char in set(key):
+                self.chars.setdefault(char, array('I')).append(i)
+            for bigram in {key[j:j + 2] for j in range(len(key) - 1)}:
+                self.bigrams.setdefault(bigram, array('I')).append(i)
+
+        forward = sorted(range(len(words)), key=lambda i: self._key(words[i]))
+        self.forward_keys = [self._key(words[i]) for i in forward]
+        self.forward_ids = array('I', forward)
+        backward = sorted(range(len(words)), key=lambda i: self._key(words[i])[::-1])
+        self.backward_keys = [self._key(words[i])[::-1] for i in backward]
+        self.backward_ids = array('I', backward)
+
+    @staticmethod
+    def _key(word: str) -> str:
+        return word.rstrip('\r\n')
+
+    def filter(self, reg, negate: bool = False) -> list:
+        candidates = self.candidates(reg)
+        if candidates is None:
+            candidates = range(len(self.words))
+        matched = [i for i in sorted(candidates) if reg.search(self.words[i]) is not None]
+        if negate:
+            matched = set(matched)
+            return [w for i, w in enumerate(self.words) if i not in matched]
+        return [self.words[i] for i in matched]
+
+    def candidates(self, reg) -> set or None:
+        if reg.flags & re.IGNORECASE:
+            return None
+        try:
+            items = list(sre_parse.parse(reg.pattern, reg.flags))
+        except re.error:
+            return None
+
+        constraints = _Constraints()
+        if len(items) > 1 and items[0][0] is sre_parse.AT and items[0][1] in _BEGIN_ANCHORS:
+            constraints.prefix = self._leading_literals(items[1:])
+        if len(items) > 1 and items[-1][0] is sre_parse.AT and items[-1][1] in _END_ANCHORS:
+            constraints.suffix = self._leading_literals(reversed(items[:-1]))[::-1]
+        self._scan(items, constraints)
+        # keys are indexed without the line break, so the regex search has to cover line break literals itself
+        required = [constraints.prefix, constraints.suffix] + constraints.literals
+        required.extend(map(''.join, constraints.classes))
+        if any('\r' in s or '\n' in s for s in required):
+            return None
+
+        postings = []
+        if constraints.prefix:
+            postings.append(self._range(self.forward_keys, self.forward_ids, constraints.prefix))
+        if constraints.suffix:
+            postings.append(self._range(self.backward_keys, self.backward_ids, constraints.suffix[::-1]))
+        for literal in constraints.literals:
+            if len(literal) == 1:
+                postings.append(self.chars.get(literal, ()))
+            else:
+                postings.extend(self.bigrams.get(literal[j:j + 2], ()) for j in range(len(literal) - 1))
+        for chars in constraints.classes:
+            class_ids = set()
+            for char in chars:
+                class_ids.update(self.chars.get(char, ()))
+            postings.append(class_ids)
+
+        if not postings:
+            return None
+        postings.sort(key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    @staticmethod
+    def _leading_literals(items) -> str:
+        literals = []
+        for op, av in items:
+            if op is not sre_parse.LITERAL:
+                break
+            literals.append(chr(av))
+        return ''.join(literals)
+
+    def _scan(self, items, constraints: _Constraints):
+        run = []
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                run.append(chr(av))
+                continue
+            if run:
+                constraints.literals.append(''.join(run))
+                run = []
+            if op is sre_parse.SUBPATTERN:
+                if len(av) < 4 or not av[1] & re.IGNORECASE:
+                    self._scan(av[-1], constraints)
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+                if av[0] >= 1:
+                    self._scan(av[2], constraints)
+            elif op is sre_parse.IN:
+                chars = self._class_chars(av)
+                if chars is not None:
+                    constraints.classes.append(chars)
+        if run:
+            constraints.literals.append(''.join(run))
+
+    def _class_chars(self, items) -> set or None:
+        chars = set()
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                chars.add(chr(av))
+            elif op is sre_parse.RANGE:
+                # keys are indexed without the line break, so such a range cannot be answered from the index
+                if av[0] <= ord('\n') <= av[1] or av[0] <= ord('\r') <= av[1]:
+                    return None
+                chars.update(c for c in self.chars if av[0] <= ord(c) <= av[1])
+            else:
+                return None
+        return chars
+
+    @staticmethod
+    def _range(keys: list, ids: array, prefix: str) -> array:
+        start = bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end = end + 1
+        return ids[start:end]
+
+    def save(self, file: str):
+        # a json header line followed by the posting lists and the sorted ids as one native array
+        postings = array('I')
+        header = {'version': _INDEX_VERSION, 'source_stat': self.source_stat, 'words': len(self.words),
+                  'itemsize': postings.itemsize, 'byteorder': sys.byteorder, 'chars': [], 'bigrams': []}
+        for name in ('chars', 'bigrams'):
+            for key, ids in getattr(self, name).items():
+                header[name].append([key, len(ids)])
+                postings.extend(ids)
+        with atomic_open(file, 'wb') as index_file:
+            index_file.write(json.dumps(header).encode('ASCII') + b'\n')
+            postings.tofile(index_file)
+            self.forward_ids.tofile(index_file)
+            self.backward_ids.tofile(index_file)
+
+    @classmethod
+    def load(cls, file: str, words: list, source_stat: tuple):
+        with open(file, 'rb') as index_file:
+            header = json.loads(index_file.readline().decode('ASCII'))
+            data = array('I')
+            if header['version'] != _INDEX_VERSION or tuple(header['source_stat']) != source_stat \
+                    or header['words'] != len(words) or header['itemsize'] != data.itemsize \
+                    or header['byteorder'] != sys.byteorder:
+                raise ValueError('stale word index')
+            total = sum(n for _, n in header['chars']) + sum(n for _, n in header['bigrams'])
+            data.fromfile(index_file, total + 2 * len(words))
+            if index_file.read(1):
+                raise ValueError('trailing data in word index')
+        if data and max(data) >= len(words):
+            raise ValueError('word index out of range')
+
+        word_index = cls.__new__(cls)
+        word_index.words = words
+        word_index.source_stat = source_stat
+        offset = 0
+        for name in ('chars', 'bigrams'):
+            postings = {}
+            for key, n in header[name]:
+                postings[key] = data[offset:offset + n]
+                offset = offset + n
+            setattr(word_index, name, postings)
+        word_index.forward_ids = data[offset:offset + len(words)]
+        word_index.backward_ids = data[offset + len(words):]
+        word_index.forward_keys = [cls._key(words[i]) for i in word_index.forward_ids]
+        word_index.backward_keys = [cls._key(words[i])[::-1] for i in word_index.backward_ids]
+        return word_index
+
+
+def open_word_index(idx: str, wrd: str) -> WordIndex:
+    wrd_stat = os.stat(wrd)
+    source_stat = (wrd_stat.st_size, wrd_stat.st_mtime_ns)
+    with open(wrd) as wrd_file:
+        words = list(wrd_file)
+
+    if os.path.exists(idx) and os.path.isfile(idx):
+        # any unreadable, stale or truncated index is a cache miss and gets rebuilt
+        try:
+            return WordIndex.load(idx, words, source_stat)
+        except (OSError, EOFError, ValueError, KeyError, TypeError):
+            pass
+
+    word_index = WordIndex(words, source_stat)
+    word_index.save(idx)
+    return word_index
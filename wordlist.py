@@ -1,3 +1,4 @@
+import math
 import os
 import re
 import sys
@@ -7,19 +8,28 @@ from io import IOBase
 from os import path
 
 try:
-    from secrets import choice
+    from secrets import choice, randbelow
 except ImportError:
-    from random import choice
+    from random import choice, randrange as randbelow
 
+import wordindex
+import wordstore
 from hunspell import dictionary
+from hunspell.affix import Affix
+from hunspell.compound import CompoundSampler
+
+_COMPOUND_PROBES = 1000
+_MAX_COMPOUND_TRIES = 100 * _COMPOUND_PROBES
 
 
 class __Param:
     def __init__(self, error_print: callable):
         self.__error_print = error_print
         self.basic = False
+        self.compound = 0
         self.count = 4
         self.force = False
+        self.index = False
         self.max = -1
         self.min = 0
         self.negate = False
@@ -28,15 +38,21 @@ class __Param:
         self.regex = '.*'
         self.separator = ' '
         self.tosses = 5
+        self.weights = None
         self.DIC = None
 
+        self.sources = None
         self.wrd = None
+        self.idx = None
+        self.uni = None
         self.dic = None
         self.aff = None
 
     def check(self):
         if self.count < 0:
             self.__error_print('the count parameter has to be greater than 0')
+        if self.compound < 0:
+            self.__error_print('the compound parameter has to be greater or equal than 0')
         if self.min < 0:
             self.__error_print('the min parameter has to be greater or equal than 0')
         if -1 < self.max < self.min:
@@ -53,29 +69,60 @@ class __Param:
         if self.tosses < 1:
             self.__error_print('the number of tosses has to be a positive number')
 
-        self.aff = path.normpath(path.join(self.path, self.DIC + '.aff'))
-        self.dic = path.normpath(path.join(self.path, self.DIC + '.dic'))
-        self.wrd = path.normpath(path.join(self.path, self.DIC + '.wrd'))
+        if self.compound > 0 and len(self.DIC) > 1:
+            self.__error_print('compound words are only supported for a single dictionary')
+        if self.weights is not None:
+            try:
+                self.weights = [float(weight) for weight in self.weights.split(',')]
+            except ValueError:
+                self.__error_print('the weights have to be comma separated numbers')
+            if len(self.weights) != len(self.DIC):
+                self.__error_print('the number of weights has to match the number of dictionaries')
+            if min(self.weights) < 0 or sum(self.weights) <= 0:
+                self.__error_print('the weights have to be greater or equal than 0 with a positive sum')
+
+        self.sources = []
+        for name in self.DIC:
+            aff = path.normpath(path.join(self.path, name + '.aff'))
+            dic = path.normpath(path.join(self.path, name + '.dic'))
+            wrd = path.normpath(path.join(self.path, name + '.wrd'))
+            self.sources.append((aff, dic, wrd))
 
-        aff_exist = path.exists(self.aff) and path.isfile(self.aff)
-        dic_exist = path.exists(self.dic) and path.isfile(self.dic)
-        wrd_exist = path.exists(self.wrd) and path.isfile(self.wrd)
+            aff_exist = path.exists(aff) and path.isfile(aff)
+            dic_exist = path.exists(dic) and path.isfile(dic)
+            wrd_exist = path.exists(wrd) and path.isfile(wrd)
 
-        if self.force and not aff_exist:
-            self.__error_print('No affix file found: {}'.format(path.abspath(self.aff)))
+            if self.force and not aff_exist:
+                self.__error_print('No affix file found: {}'.format(path.abspath(aff)))
 
-        if self.force and not aff_exist:
-            self.__error_print('No dictionary file found: {}'.format(path.abspath(self.dic)))
+            if self.force and not aff_exist:
+                self.__error_print('No dictionary file found: {}'.format(path.abspath(dic)))
 
-        if not self.force and not dic_exist and not wrd_exist:
-            self.__error_print(
-                'No dictionary or word list file found: {}, {}'.format(path.abspath(self.dic), path.abspath(self.wrd))
-            )
+            if self.compound > 0 and (not aff_exist or not dic_exist):
+                self.__error_print(
+                    'Compound words need the dictionary files: {}, {}'.format(path.abspath(aff), path.abspath(dic))
+                )
 
-        if not self.force and not aff_exist and not wrd_exist:
-            self.__error_print(
-                'No affix or word list file found: {}, {}'.format(path.abspath(self.aff), path.abspath(self.wrd))
-            )
+            if not self.force and not dic_exist and not wrd_exist:
+                self.__error_print(
+                    'No dictionary or word list file found: {}, {}'.format(path.abspath(dic), path.abspath(wrd))
+                )
+
+            if not self.force and not aff_exist and not wrd_exist:
+                self.__error_print(
+                    'No affix or word list file found: {}, {}'.format(path.abspath(aff), path.abspath(wrd))
+                )
+
+        name = '+'.join(self.DIC)
+        if len(self.DIC) == 1:
+            self.aff, self.dic, self.wrd = self.sources[0]
+        else:
+            self.wrd = path.normpath(path.join(self.path, name + '.wrd'))
+            self.uni = path.normpath(path.join(self.path, name + '.uni'))
+        self.idx = path.normpath(path.join(self.path, name + '.idx'))
+
+    def error(self, message: str):
+        self.__error_print(message)
 
     def __repr__(self):
         type_name = type(self).__name__
@@ -93,52 +140,135 @@ def main():
     param.check()
 
     wrd_exist = path.exists(param.wrd) and path.isfile(param.wrd)
+    use_index = param.index and param.regex != '.*'
+    store = None
+    word_deque = None
 
-    if param.force or not wrd_exist:
-        word_deque = dictionary.word_list(param.aff, param.dic, param.basic)
-        with open(param.wrd, 'w') as wrd_file:
-            wrd_file.write(os.linesep.join(word_deque))
-    else:
+    if len(param.sources) > 1:
+        for aff, dic, wrd in param.sources:
+            if param.force or not path.exists(wrd) or not path.isfile(wrd):
+                dictionary.write_word_list(aff, dic, wrd, param.basic)
+        store = wordstore.open_union_store(param.uni, param.wrd, [wrd for _, _, wrd in param.sources])
+    elif param.force or not wrd_exist:
+        word_deque = dictionary.write_word_list(param.aff, param.dic, param.wrd, param.basic)
+
+    if word_deque is None and not use_index:
         with open(param.wrd) as wrd:
             word_deque = deque(wrd)
 
-    if param.regex == '.*':
-        if param.max == -1:
-            if param.min == 0:
-                pass
-            else:
-                word_deque = filter(lambda w: param.min < len(w), word_deque)
+    # cached words carry their line break, the length is compared without it like for the compound words
+    if param.max == -1:
+        if param.min == 0:
+            len_filter = None
         else:
-            if param.min == 0:
-                word_deque = filter(lambda w: len(w) < param.max, word_deque)
-            else:
-                word_deque = filter(lambda w: param.min < len(w) < param.max, word_deque)
+            len_filter = lambda w: param.min < len(w.rstrip('\r\n'))
+    else:
+        if param.min == 0:
+            len_filter = lambda w: len(w.rstrip('\r\n')) < param.max
+        else:
+            len_filter = lambda w: param.min < len(w.rstrip('\r\n')) < param.max
+
+    if param.regex == '.*':
+        reg_filter = None
     else:
         reg = re.compile(param.regex)
         reg_filter = (lambda w: reg.search(w) is None) if param.negate else (lambda w: reg.search(w) is not None)
-        if param.max == -1:
-            if param.min == 0:
-                word_deque = filter(lambda w: reg_filter(w), word_deque)
-            else:
-                word_deque = filter(lambda w: reg_filter(w) and param.min < len(w), word_deque)
-        else:
-            if param.min == 0:
-                word_deque = filter(lambda w: reg_filter(w) and len(w) < param.max, word_deque)
-            else:
-                word_deque = filter(lambda w: reg_filter(w) and param.min < len(w) < param.max, word_deque)
+
+    if reg_filter is None:
+        word_filter = len_filter
+    elif len_filter is None:
+        word_filter = reg_filter
+    else:
+        word_filter = lambda w: reg_filter(w) and len_filter(w)
+
+    if use_index:
+        word_index = wordindex.open_word_index(param.idx, param.wrd)
+        word_deque = word_index.filter(reg, param.negate)
+        if len_filter is not None:
+            word_deque = filter(len_filter, word_deque)
+    elif word_filter is not None:
+        word_deque = filter(word_filter, word_deque)
+
+    compounds = None
+    if param.compound > 0:
+        affix = Affix(param.aff, generation_only=True)
+        tables = dictionary.iter_stem_chunks(param.dic, affix.encoding, affix.iconv)
+        compounds = CompoundSampler(affix, tables, param.compound, param.min, param.max)
 
     word_list = list(word_deque)
 
-    print('with {:,d} off {:,d} words has possible {:,d} combinations'.format(
-        param.count, len(word_list), pow(len(word_list), param.count)
-    ))
+    # the length filter is part of the compound count, the share matching the regex is estimated by sampling
+    accepted, probes = 1, 1
+    if compounds is not None and compounds.size > 0 and reg_filter is not None:
+        accepted = sum(1 for _ in range(_COMPOUND_PROBES) if reg_filter(compounds.sample()))
+        probes = _COMPOUND_PROBES
+    if compounds is not None and compounds.size * accepted == 0:
+        compounds = None
+
+    if store is not None:
+        if param.weights is None:
+            if not word_list:
+                param.error('no word matches the filter')
+            sampler = wordstore.UniformSampler(word_list)
+        else:
+            try:
+                sampler = wordstore.WeightedSampler(word_list, store, param.weights)
+            except ValueError as e:
+                param.error(str(e))
+        print('with {:,d} off {:,d} words from {:,d} dictionaries has possible {:,d} combinations'
+              ' and {:.1f} bits of entropy'.format(
+            param.count, sampler.size, len(param.sources), pow(sampler.size, param.count),
+            sampler.entropy * param.count
+        ))
+        print()
+
+        for _ in range(param.tosses):
+            words = [sampler.choice().strip() for _ in range(param.count)]
+            print(param.separator.join(words), end=os.linesep, file=param.output)
+        return
+
+    if compounds is None:
+        if not word_list:
+            param.error('no word matches the filter')
+        print('with {:,d} off {:,d} words has possible {:,d} combinations and {:.1f} bits of entropy'.format(
+            param.count, len(word_list), pow(len(word_list), param.count), math.log2(len(word_list)) * param.count
+        ))
+    else:
+        compound_count = compounds.size * accepted // probes
+        qualifier = 'up to' if probes == 1 else 'about'
+        print('with {:,d} off {:,d} words and {} {:,d} compound words has possible {} {:,d} combinations'
+              ' and {} {:.1f} bits of entropy'.format(
+            param.count, len(word_list), qualifier, compound_count, qualifier,
+            pow(len(word_list) + compound_count, param.count),
+            qualifier, math.log2(len(word_list) + compound_count) * param.count
+        ))
     print()
 
     for _ in range(param.tosses):
-        words = [choice(word_list).strip() for _ in range(param.count)]
+        try:
+            words = [_choose_word(word_list, compounds, reg_filter, accepted, probes).strip()
+                     for _ in range(param.count)]
+        except ValueError as e:
+            param.error(str(e))
         print(param.separator.join(words), end=os.linesep, file=param.output)
 
 
+def _choose_word(word_list: list, compounds: CompoundSampler or None, reg_filter: callable or None,
+                 accepted: int, probes: int) -> str:
+    if compounds is None:
+        return choice(word_list)
+    # plain words against the estimated number of compounds matching the regex
+    index = randbelow(len(word_list) * probes + compounds.size * accepted)
+    if index < len(word_list) * probes:
+        return word_list[index // probes]
+    for _ in range(_MAX_COMPOUND_TRIES):
+        word = compounds.sample()
+        if reg_filter is None or reg_filter(word):
+            return word
+    # falling back to a plain word would skew the printed distribution
+    raise ValueError('no compound word matches the filter in {:,d} draws'.format(_MAX_COMPOUND_TRIES))
+
+
 def parse_args() -> (callable, __Param):
     parser = ArgumentParser(
         description='The programme will generate a random password based on words. '
@@ -148,6 +278,7 @@ def parse_args() -> (callable, __Param):
                ' list. That means if you want to use the en-GB.aff and en-GB.dic to generate a password. You type for'
                ' the DIC parameter "en-GB". This also applies to a corresponding word list file (.wrd). If both types'
                ' exist, a word list file (DIC.wrd) and dictionary files (DIC.aff, DIC.dic), the word file will be used.'
+               ' If several DIC parameters are given, their words are merged into one word list without duplicates.'
     )
 
     parser.add_argument('-b', '--basic',
@@ -162,6 +293,14 @@ def parse_args() -> (callable, __Param):
     parser.add_argument('-g', '--max',
                         type=int,
                         help='the max. length for a chosen word, -1 for no limit, default is -1')
+    parser.add_argument('-i', '--index',
+                        action='store_true',
+                        help='use a character index to speed up the regex filter, the index is stored next to the'
+                             ' word list file (DIC.idx)')
+    parser.add_argument('-k', '--compound',
+                        type=int,
+                        metavar='PARTS',
+                        help='add compound words of up to PARTS stems from the dictionary rules, default is 0 (off)')
     parser.add_argument('-l', '--min',
                         type=int,
                         help='the min. length for a chosen word, default is 0')
@@ -180,8 +319,12 @@ def parse_args() -> (callable, __Param):
     parser.add_argument('-t', '--tosses',
                         type=int,
                         help='number of passwords that should generated, default is 3')
+    parser.add_argument('-w', '--weights',
+                        help='comma separated weights of the DIC parameters for choosing a word, e.g. "2,1", default'
+                             ' is a uniform choice over all words')
     parser.add_argument('DIC',
-                        help='the name of the dictionary or word list that should be used in the given directory')
+                        nargs='+',
+                        help='the names of the dictionaries or word lists that should be used in the given directory')
 
     param = __Param(parser.error)
     parser.parse_args(namespace=param)
@@ -0,0 +1,128 @@
+import json
+import math
+import os
+
+try:
+    from secrets import choice, randbelow
+except ImportError:
+    from random import choice, randrange as randbelow
+
+from hunspell.dictionary import atomic_open
+
+_WEIGHT_RESOLUTION = 1 << 53
+_STORE_VERSION = 1
+
+
+class UnionWordStore:
+    def __init__(self, sources: list, fingerprint: tuple = None):
+        self.fingerprint = fingerprint
+        self.masks = {}
+
+        for bit, source in enumerate(sources):
+            with open(source) as wrd_file:
+                for line in wrd_file:
+                    word = line.rstrip('\r\n')
+                    if word:
+                        self.masks[word] = self.masks.get(word, 0) | 1 << bit
+
+    def mask(self, word: str) -> int:
+        return self.masks.get(word.rstrip('\r\n'), 0)
+
+    def write(self, file: str):
+        with atomic_open(file, 'w') as wrd_file:
+            wrd_file.writelines(word + '\n' for word in self.masks)
+
+    def save(self, file: str, wrd: str):
+        # a json header line followed by one "mask<TAB>word" line per word, tied to the written word list
+        wrd_stat = os.stat(wrd)
+        header = {'version': _STORE_VERSION, 'fingerprint': self.fingerprint, 'words': len(self.masks),
+                  'wrd_stat': (wrd_stat.st_size, wrd_stat.st_mtime_ns)}
+        with atomic_open(file, 'w') as store_file:
+            store_file.write(json.dumps(header) + '\n')
+            store_file.writelines('{:d}\t{}\n'.format(mask, word) for word, mask in self.masks.items())
+
+    @classmethod
+    def load(cls, file: str, wrd: str, fingerprint: tuple):
+        wrd_stat = os.stat(wrd)
+        store = cls([], fingerprint)
+        with open(file) as store_file:
+            header = json.loads(store_file.readline())
+            if header['version'] != _STORE_VERSION or tuple(map(tuple, header['fingerprint'])) != fingerprint \
+                    or tuple(header['wrd_stat']) != (wrd_stat.st_size, wrd_stat.st_mtime_ns):
+                raise ValueError('stale union word store')
+            for line in store_file:
+                if not line.endswith('\n'):
+                    raise ValueError('truncated union word store')
+                mask, word = line[:-1].split('\t', 1)
+                store.masks[word] = int(mask)
+        if len(store.masks) != header['words']:
+            raise ValueError('truncated union word store')
+        return store
+
+
+class UniformSampler:
+    def __init__(self, words: list):
+        self.words = words
+        self.size = len(words)
+        self.entropy = math.log2(self.size) if self.size > 0 else 0.0
+
+    def choice(self) -> str:
+        return choice(self.words)
+
+
+class WeightedSampler:
+    def __init__(self, words: list, store: UnionWordStore, weights: list):
+        self.words = [[] for _ in weights]
+        for word in words:
+            mask = store.mask(word)
+            for bit, language_words in enumerate(self.words):
+                if mask >> bit & 1:
+                    language_words.append(word)
+
+        self.weights = [weight if language_words else 0 for weight, language_words in zip(weights, self.words)]
+        total = sum(self.weights)
+        if total <= 0:
+            raise ValueError('no word of a dictionary with a positive weight matches the filter')
+
+        probabilities = {}
+        for weight, language_words in zip(self.weights, self.words):
+            for word in language_words:
+                probabilities[word] = probabilities.get(word, 0.0) + weight / total / len(language_words)
+        probabilities = [p for p in probabilities.values() if p > 0]
+        self.size = len(probabilities)
+        self.entropy = -sum(p * math.log2(p) for p in probabilities)
+
+    def choice(self) -> str:
+        point = randbelow(_WEIGHT_RESOLUTION) * sum(self.weights) / _WEIGHT_RESOLUTION
+        chosen = None
+        for weight, language_words in zip(self.weights, self.words):
+            if weight > 0:
+                chosen = language_words
+                if point < weight:
+                    break
+            point = point - weight
+        return choice(chosen)
+
+
+def _fingerprint(sources: list) -> tuple:
+    fingerprint = []
+    for source in sources:
+        stat = os.stat(source)
+        fingerprint.append((os.path.abspath(source), stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+def open_union_store(file: str, wrd: str, sources: list) -> UnionWordStore:
+    fingerprint = _fingerprint(sources)
+
+    if os.path.exists(file) and os.path.isfile(file) and os.path.exists(wrd) and os.path.isfile(wrd):
+        # any unreadable, stale or truncated store is a cache miss and gets rebuilt
+        try:
+            return UnionWordStore.load(file, wrd, fingerprint)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    store = UnionWordStore(sources, fingerprint)
+    store.write(wrd)
+    store.save(file, wrd)
+    return store